@@ -58,7 +58,9 @@ DATABASES = {
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # Byte-identical to rest_framework.renderers.JSONRenderer, faster
+        # when orjson is installed
+        'url_shortener.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -74,8 +76,17 @@ REST_FRAMEWORK = {
         'url_access': '1000/hour',
     },
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    # Number of reverse proxies in front of the app. With 0, throttles and
+    # creator quotas key on REMOTE_ADDR and ignore the client-controlled
+    # X-Forwarded-For (None would make DRF's throttles trust all of it).
+    # Deployments behind a proxy must set this, or every client is counted
+    # as the proxy and shares its throttle and daily creator quota.
+    'NUM_PROXIES': 0,
 }
 
+# Stats invalidation and trending counts rely on the cache being shared
+# between workers, so use Redis or Memcached in production. LocMemCache is
+# per process: other workers only see changes once their entries expire.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -87,6 +98,77 @@ CACHES = {
     }
 }
 
+# Creator addresses are stored and counted per network, e.g. an IPv4 /24 or
+# IPv6 /64, so a single host can't dodge the quota by rotating addresses.
+URL_SHORTENER_CREATOR_IP_PREFIX = {
+    'ipv4': 24,
+    'ipv6': 64,
+}
+
+# Maximum short URLs a creator (network) can create per day; None disables it
+URL_SHORTENER_DAILY_CREATOR_QUOTA = 500
+
+# Serialize shorten/stats responses from values() rows instead of
+# ModelSerializer instances; the output is the same
+URL_SHORTENER_FAST_SERIALIZATION = True
+
+# Top clicked links over a sliding window, see url_shortener.trending.
+# Workers share counts through the default cache, so use a shared backend
+# (Redis, Memcached) in production.
+URL_SHORTENER_TRENDING = {
+    'CAPACITY': 200,
+    'WINDOW': 60 * 60,
+    'BUCKETS': 12,
+    'FLUSH_INTERVAL': 10,
+    'TOP': 20,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'url_shortener.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'url_shortener.log.SamplingFilter',
+            'rates': {
+                'redirect': 0.01,
+            },
+        },
+        'rate_limit': {
+            '()': 'url_shortener.log.RateLimitFilter',
+            'window': 10,
+            'burst': 1,
+            'key_fields': ['short_code'],
+            'events': ['short_code_not_found', 'stats_not_found'],
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+            'filters': ['sampling', 'rate_limit'],
+        },
+    },
+    'loggers': {
+        'url_shortener': {
+            'handlers': ['console'],
+            'level': os.environ.get('URL_SHORTENER_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Hand url_shortener log records to a background thread for formatting and I/O
+URL_SHORTENER_QUEUE_LOGGING = True
+
+# Records waiting for the logging thread; beyond this they are dropped and
+# reported as a 'log_queue_full' summary
+URL_SHORTENER_LOG_QUEUE_SIZE = 10000
+
 LANGUAGE_CODE = "en-us"
 
 TIME_ZONE = "UTC"
@@ -1,10 +1,42 @@
 from django.contrib import admin
-from .models import URLMapping
+from django.contrib.admin.actions import delete_selected
+from .models import CreatorQuota, URLMapping
+from .utils import normalize_creator_ip
+
+
+class CreatorIPSearchMixin:
+    # An address typed into the search box is normalized like stored creator
+    # IPs and matched exactly, so the lookup can use the creator_ip index
+    def get_search_results(self, request, queryset, search_term):
+        creator_ip = normalize_creator_ip(search_term.strip())
+        if creator_ip:
+            return queryset.filter(creator_ip=creator_ip), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(URLMapping)
-class URLMappingAdmin(admin.ModelAdmin):
-    list_display = ['short_code', 'original_url', 'created_at']
+class URLMappingAdmin(CreatorIPSearchMixin, admin.ModelAdmin):
+    list_display = ['short_code', 'original_url', 'creator_ip', 'created_at']
     list_filter = ['created_at']
     search_fields = ['short_code', 'original_url']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'creator_ip']
+    actions = ['delete_creator_urls']
+
+    @admin.action(
+        description="Delete all URLs from the selected URLs' creators",
+        permissions=['delete']
+    )
+    def delete_creator_urls(self, request, queryset):
+        creator_ips = queryset.exclude(creator_ip=None).values_list('creator_ip', flat=True)
+        # Hand the expanded selection to the stock delete_selected action so
+        # it goes through the same confirmation page and permission checks
+        return delete_selected(
+            self, request, URLMapping.objects.filter(creator_ip__in=set(creator_ips))
+        )
+
+
+@admin.register(CreatorQuota)
+class CreatorQuotaAdmin(CreatorIPSearchMixin, admin.ModelAdmin):
+    list_display = ['creator_ip', 'day', 'count']
+    list_filter = ['day']
+    search_fields = ['creator_ip']
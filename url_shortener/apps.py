@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "url_shortener"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if getattr(settings, 'URL_SHORTENER_QUEUE_LOGGING', False):
+            from .log import install_queue_logging
+            install_queue_logging(
+                self.name,
+                maxsize=getattr(settings, 'URL_SHORTENER_LOG_QUEUE_SIZE', 10000)
+            )
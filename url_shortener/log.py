@@ -0,0 +1,319 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Attributes every LogRecord carries; anything else was passed via ``extra``.
+_RESERVED_ATTRS = frozenset(
+    logging.LogRecord('', 0, '', 0, '', (), None).__dict__
+) | {'message', 'asctime'}
+
+
+def _event_name(record):
+    return getattr(record, 'event', None) or record.msg
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Render a record as a single JSON line.
+
+    ``extra`` fields are emitted as top-level keys. The message is only
+    interpolated here, so with a queued handler that work happens on the
+    listener thread rather than in the request.
+    """
+
+    def format(self, record):
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': _event_name(record),
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records per event.
+
+    ``rates`` maps event names to a keep probability between 0 and 1.
+    Events not listed use ``default_rate``, except warnings and above,
+    which are only sampled when their event is listed explicitly.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+
+    def filter(self, record):
+        event = _event_name(record)
+        if event in self.rates:
+            rate = self.rates[event]
+        elif record.levelno >= logging.WARNING:
+            return True
+        else:
+            rate = self.default_rate
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        record.sample_rate = rate
+        return random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most ``burst`` records per key in each ``window`` seconds.
+
+    The key is the event name plus the values of ``key_fields`` on the
+    record, so e.g. 404s are counted per short code. Suppressed records
+    are only counted; ``collect()`` closes finished windows and returns one
+    summary record per key with ``suppressed`` set to the count and
+    ``suppressed_window`` to the seconds it covers. ``AggregatingQueueListener``
+    calls it periodically and on stop.
+    """
+
+    def __init__(self, window=10, burst=1, key_fields=('short_code',),
+                 events=None, max_keys=10000, clock=time.monotonic):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.key_fields = tuple(key_fields)
+        self.events = set(events) if events is not None else None
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = {}  # key -> [start, passed, suppressed, record]
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _key(self, record):
+        return (_event_name(record),) + tuple(
+            getattr(record, field, None) for field in self.key_fields
+        )
+
+    def filter(self, record):
+        if getattr(record, 'aggregate', False):
+            return True
+        if self.events is not None and _event_name(record) not in self.events:
+            return True
+
+        key = self._key(record)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or now - bucket[0] >= self.window:
+                if bucket is not None:
+                    self._close(bucket, now)
+                elif len(self._buckets) >= self.max_keys:
+                    # Flood of distinct keys: close every window early
+                    for other in self._buckets.values():
+                        self._close(other, now)
+                    self._buckets.clear()
+                self._buckets[key] = [now, 1, 0, record]
+                return True
+            if bucket[1] < self.burst:
+                bucket[1] += 1
+                return True
+            bucket[2] += 1
+            return False
+
+    def collect(self, force=False):
+        """Return summary records for closed windows (all windows if ``force``)."""
+        now = self.clock()
+        with self._lock:
+            for key, bucket in list(self._buckets.items()):
+                if force or now - bucket[0] >= self.window:
+                    self._close(bucket, now)
+                    del self._buckets[key]
+            summaries, self._pending = self._pending, []
+        return summaries
+
+    def _close(self, bucket, now):
+        start, _, suppressed, first = bucket
+        if not suppressed or len(self._pending) >= self.max_keys:
+            return
+        covered = round(min(now - start, self.window), 3)
+        summary = logging.makeLogRecord({
+            'name': first.name,
+            'levelno': first.levelno,
+            'levelname': first.levelname,
+            'msg': "Suppressed %d '%s' records in the last %ss",
+            'args': (suppressed, _event_name(first), covered),
+            'event': _event_name(first),
+            'aggregate': True,
+            'suppressed': suppressed,
+            'suppressed_window': covered,
+        })
+        for field in self.key_fields:
+            if hasattr(first, field):
+                setattr(summary, field, getattr(first, field))
+        self._pending.append(summary)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+
+    The stock ``prepare`` formats the message in the calling thread; we
+    leave that to the handlers behind the listener. The queue never
+    leaves the process, so records don't need to be made picklable.
+    When a bounded queue is full the record is dropped and counted;
+    ``collect()`` turns the count into a summary record.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def collect(self, force=False):
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if not dropped:
+            return []
+        return [logging.makeLogRecord({
+            'name': __name__,
+            'levelno': logging.WARNING,
+            'levelname': 'WARNING',
+            'msg': "Dropped %d log records, queue full",
+            'args': (dropped,),
+            'event': 'log_queue_full',
+            'aggregate': True,
+            'dropped': dropped,
+        })]
+
+
+class AggregatingQueueListener(QueueListener):
+    """
+    QueueListener that also emits summary records.
+
+    Every ``interval`` seconds, whether or not records are arriving, the
+    listener thread calls ``collect()`` on each of ``aggregators``
+    (``RateLimitFilter``s, the queue handler) and hands the summaries to
+    its handlers. ``stop()`` flushes whatever is left.
+    """
+
+    def __init__(self, queue, *handlers, aggregators=(), interval=1.0,
+                 respect_handler_level=False):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self.aggregators = list(aggregators)
+        self.interval = interval
+        self._next_flush = time.monotonic() + interval
+
+    def dequeue(self, block):
+        while True:
+            timeout = max(self._next_flush - time.monotonic(), 0)
+            try:
+                record = self.queue.get(block, timeout)
+                received = True
+            except queue.Empty:
+                received = False
+            if time.monotonic() >= self._next_flush:
+                self.flush_aggregates()
+                self._next_flush = time.monotonic() + self.interval
+            # The stop sentinel is None, so track receipt separately
+            if received:
+                return record
+            if not block:
+                raise queue.Empty
+
+    def flush_aggregates(self, force=False):
+        for aggregator in self.aggregators:
+            for record in aggregator.collect(force=force):
+                self.handle(record)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+        self.flush_aggregates(force=True)
+
+
+_listeners = {}
+
+
+def _restart_after_fork(listener, queue_handler, maxsize):
+    # Only the forking thread survives fork, so a child (e.g. a gunicorn
+    # worker forked after --preload) needs its own queue and listener thread
+    log_queue = queue.Queue(maxsize)
+    queue_handler.queue = log_queue
+    listener.queue = log_queue
+    listener._thread = None
+    listener.start()
+
+
+def install_queue_logging(logger_name, maxsize=10000):
+    """
+    Move the handlers of ``logger_name`` behind a QueueListener.
+
+    The logger keeps a single queue handler so callers only pay for the
+    filters and an enqueue; the original handlers run on the listener
+    thread. Filters shared by all moved handlers are hoisted onto the
+    queue handler so that dropped records never reach the queue. At most
+    ``maxsize`` records wait in the queue; beyond that they are dropped
+    and counted. Forked children restart the listener. Safe to call more
+    than once.
+    """
+    if logger_name in _listeners:
+        return _listeners[logger_name]
+
+    logger = logging.getLogger(logger_name)
+    handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return None
+
+    shared_filters = [
+        f for f in handlers[0].filters
+        if all(f in h.filters for h in handlers[1:])
+    ]
+    log_queue = queue.Queue(maxsize)
+    queue_handler = DeferredQueueHandler(log_queue)
+    for f in shared_filters:
+        queue_handler.addFilter(f)
+    for handler in handlers:
+        for f in shared_filters:
+            handler.removeFilter(f)
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+
+    aggregators = [
+        f for f in shared_filters + [f for h in handlers for f in h.filters]
+        if isinstance(f, RateLimitFilter)
+    ]
+    listener = AggregatingQueueListener(
+        log_queue, *handlers,
+        aggregators=list(dict.fromkeys(aggregators)) + [queue_handler],
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=functools.partial(
+            _restart_after_fork, listener, queue_handler, maxsize
+        ))
+
+    _listeners[logger_name] = listener
+    return listener
@@ -0,0 +1,65 @@
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from ...models import URLMapping
+
+
+class Command(BaseCommand):
+    help = "Measure redirect/404 latency with request logging on and off."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=200)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            URLMapping.objects.create(
+                original_url='https://www.example.com/benchmark',
+                short_code='bench1'
+            )
+            paths = {
+                'redirect': reverse('redirect_url', kwargs={'short_code': 'bench1'}),
+                'not_found': reverse('redirect_url', kwargs={'short_code': 'missing'}),
+            }
+            for label, path in paths.items():
+                for mode in ('off', 'on'):
+                    timings = self._run(path, mode, options)
+                    self._report(label, mode, timings)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, path, mode, options):
+        client = Client()
+        if mode == 'off':
+            logging.disable(logging.CRITICAL)
+        try:
+            for _ in range(options['warmup']):
+                client.get(path)
+            timings = []
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                client.get(path)
+                timings.append(time.perf_counter() - start)
+        finally:
+            logging.disable(logging.NOTSET)
+        return timings
+
+    def _report(self, label, mode, timings):
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(
+            f"{label:<10} logging={mode:<3} "
+            f"mean={statistics.mean(timings) * 1e6:8.1f}us "
+            f"p50={statistics.median(timings) * 1e6:8.1f}us "
+            f"p99={p99 * 1e6:8.1f}us"
+        )
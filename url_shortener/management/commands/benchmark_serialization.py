@@ -0,0 +1,63 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ...models import URLMapping
+from ...renderers import FastJSONRenderer
+from ...serializers import (
+    FastURLShortenResponseSerializer,
+    FastURLStatsSerializer,
+    URLShortenResponseSerializer,
+    URLStatsSerializer
+)
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer + JSONRenderer with the fast serialization path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        request = RequestFactory().get('/', HTTP_HOST='localhost')
+        now = timezone.now()
+        mapping = URLMapping(
+            original_url='https://www.example.com/some/long/path?with=query',
+            short_code='bench1',
+            created_at=now,
+            last_accessed=now,
+            access_count=42
+        )
+        fast_shorten = FastURLShortenResponseSerializer()
+        fast_stats = FastURLStatsSerializer()
+        shorten_row = {f: getattr(mapping, f) for f in fast_shorten.source_fields}
+        stats_row = {f: getattr(mapping, f) for f in fast_stats.source_fields}
+        json_renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+
+        cases = {
+            'shorten': (
+                lambda: json_renderer.render(
+                    URLShortenResponseSerializer(mapping, context={'request': request}).data
+                ),
+                lambda: fast_renderer.render(fast_shorten.serialize(shorten_row, request)),
+            ),
+            'stats': (
+                lambda: json_renderer.render(URLStatsSerializer(mapping).data),
+                lambda: fast_renderer.render(fast_stats.serialize(stats_row)),
+            ),
+        }
+        for label, (current, fast) in cases.items():
+            if current() != fast():
+                self.stderr.write(f"{label}: output differs")
+            current_time = min(timeit.repeat(current, number=number, repeat=3)) / number
+            fast_time = min(timeit.repeat(fast, number=number, repeat=3)) / number
+            self.stdout.write(
+                f"{label:<8} current={current_time * 1e6:7.2f}us "
+                f"fast={fast_time * 1e6:7.2f}us "
+                f"speedup={current_time / fast_time:5.1f}x"
+            )
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "url_shortener",
+            "0002_urlmapping_access_count_urlmapping_last_accessed_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CreatorQuota",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "creator_ip",
+                    models.GenericIPAddressField(
+                        help_text="Normalized creator address (see URL_SHORTENER_CREATOR_IP_PREFIX)"
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="urlmapping",
+            name="creator_ip",
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="urlmapping",
+            index=models.Index(
+                fields=["creator_ip", "created_at"],
+                name="url_shorten_creator_95f598_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="creatorquota",
+            constraint=models.UniqueConstraint(
+                fields=("creator_ip", "day"), name="unique_creator_quota_per_day"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("url_shortener", "0003_creator_ip_and_quota"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="creatorquota",
+            index=models.Index(fields=["day"], name="url_shorten_day_ba37c2_idx"),
+        ),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
+from django.core.cache import cache
 from django.core.validators import URLValidator
 from django.db.models import F
 from django.utils import timezone
+import hashlib
 import string
 import random
+import time
+
+
+# Version bumps only reach workers that share the cache; this bounds how
+# stale stats can be when they don't (or when a write skips the signals)
+STATS_CACHE_TIMEOUT = 60
 
 
 class URLMapping(models.Model):
@@ -34,6 +42,7 @@ class URLMapping(models.Model):
             models.Index(fields=['short_code']),
             models.Index(fields=['created_at']),
             models.Index(fields=['access_count']),
+            models.Index(fields=['creator_ip', 'created_at']),
         ]
     
     def __str__(self):
@@ -44,8 +53,46 @@ class URLMapping(models.Model):
             access_count=F('access_count') + 1,
             last_accessed=timezone.now()
         )
+        URLMapping.invalidate_stats_cache(self.short_code)
         self.refresh_from_db()
     
+    # Cached stats live under a per-code version that every change bumps
+    # (here, and from the post_save/post_delete receivers in signals.py), so
+    # a reader that loaded old data before the bump can only store it under
+    # a version nobody reads anymore. A missing version starts from the
+    # current time rather than 0, so an expired, evicted or forgotten version
+    # can't revive old entries; that is what lets version keys expire.
+    @staticmethod
+    def _stats_cache_id(short_code):
+        # Keep arbitrary path values from producing invalid cache keys
+        if short_code.isascii() and short_code.isalnum():
+            return short_code
+        return hashlib.md5(short_code.encode(), usedforsecurity=False).hexdigest()
+    
+    @staticmethod
+    def stats_cache_key(short_code):
+        cache_id = URLMapping._stats_cache_id(short_code)
+        version_key = f'stats-version:{cache_id}'
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, time.time_ns(), timeout=STATS_CACHE_TIMEOUT)
+            version = cache.get(version_key, 0)
+        return f'stats:{cache_id}:{version}'
+    
+    @staticmethod
+    def forget_stats_cache(short_code):
+        cache.delete(f'stats-version:{URLMapping._stats_cache_id(short_code)}')
+    
+    @staticmethod
+    def invalidate_stats_cache(short_code):
+        version_key = f'stats-version:{URLMapping._stats_cache_id(short_code)}'
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            # No version yet, so nothing was cached under it; the next
+            # stats_cache_key() call starts a fresh one
+            pass
+    
     @staticmethod
     def generate_short_code(length=6):
         chars = string.ascii_letters + string.digits
@@ -57,3 +104,49 @@ class URLMapping(models.Model):
                 return code
         
         return URLMapping.generate_short_code(length + 1)
+
+
+class CreatorQuota(models.Model):
+    creator_ip = models.GenericIPAddressField(
+        help_text="Normalized creator address (see URL_SHORTENER_CREATOR_IP_PREFIX)"
+    )
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    # Day up to which this process has already purged old counters
+    _purged_through = None
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['creator_ip', 'day'],
+                name='unique_creator_quota_per_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.creator_ip} {self.day}: {self.count}"
+
+    @classmethod
+    def consume(cls, creator_ip, limit):
+        today = timezone.now().date()
+        # Only today's counters matter; drop older ones once per day
+        if cls._purged_through != today:
+            cls._purged_through = today
+            cls.purge_before(today)
+        
+        counter, _ = cls.objects.get_or_create(
+            creator_ip=creator_ip,
+            day=today
+        )
+        updated = cls.objects.filter(pk=counter.pk, count__lt=limit).update(
+            count=F('count') + 1
+        )
+        return bool(updated)
+
+    @classmethod
+    def purge_before(cls, day):
+        return cls.objects.filter(day__lt=day).delete()
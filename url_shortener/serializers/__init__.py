@@ -4,4 +4,8 @@ from .url_serializers import (
 )
 from .stat_serializers import URLStatsSerializer
 from .error_serializers import ErrorSerializer
+from .fast_serializers import (
+    FastURLShortenResponseSerializer,
+    FastURLStatsSerializer
+)
 
@@ -0,0 +1,126 @@
+from django.utils import timezone
+from django.utils.encoding import iri_to_uri
+from rest_framework import ISO_8601, fields as drf_fields, serializers
+from rest_framework.settings import api_settings
+
+from .stat_serializers import URLStatsSerializer
+from .url_serializers import URLShortenResponseSerializer
+
+
+_base_urls = {}
+_BASE_URL_CACHE_SIZE = 256
+
+
+def get_base_url(request):
+    """
+    Return ``scheme://host`` for ``request``, cached per scheme and host.
+
+    The key holds every header ``get_host()`` may read, including
+    X-Forwarded-Port when ``USE_X_FORWARDED_PORT`` is on.
+
+    The first request for a host goes through ``request.get_host()`` so
+    ALLOWED_HOSTS validation still applies before anything is cached.
+    """
+    meta = request.META
+    key = (
+        request.scheme,
+        meta.get('HTTP_X_FORWARDED_HOST'),
+        meta.get('HTTP_HOST'),
+        meta.get('SERVER_NAME'),
+        meta.get('SERVER_PORT'),
+        meta.get('HTTP_X_FORWARDED_PORT'),
+    )
+    base_url = _base_urls.get(key)
+    if base_url is None:
+        base_url = iri_to_uri(f'{request.scheme}://{request.get_host()}')
+        if len(_base_urls) >= _BASE_URL_CACHE_SIZE:
+            _base_urls.clear()
+        _base_urls[key] = base_url
+    return base_url
+
+
+def _datetime_converter(field):
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        if hasattr(field, 'timezone'):
+            field_timezone = field.timezone
+        else:
+            field_timezone = field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
+
+
+def _converter(field):
+    if isinstance(field, drf_fields.DateTimeField):
+        return _datetime_converter(field)
+    if type(field) in (drf_fields.CharField, drf_fields.URLField):
+        return str
+    if type(field) is drf_fields.IntegerField:
+        return int
+    return field.to_representation
+
+
+class ValuesSerializer:
+    """
+    Serialize ``values()`` rows with the output of ``serializer_class``.
+
+    The field plan is computed once from the serializer's fields, so each
+    row costs a dict lookup and a converter call per field. Method fields
+    are resolved with ``get_<field_name>(row, request)`` on this class.
+    Rows may also be model instances.
+    """
+
+    serializer_class = None
+
+    def __init__(self):
+        self.plan = []
+        self.source_fields = []
+        for name, field in self.serializer_class().fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                self.plan.append((name, None, getattr(self, f'get_{name}')))
+            else:
+                self.plan.append((name, field.source, _converter(field)))
+                self.source_fields.append(field.source)
+
+    def serialize(self, row, request=None):
+        if isinstance(row, dict):
+            get = row.__getitem__
+        else:
+            get = row.__getattribute__
+        data = {}
+        for name, source, convert in self.plan:
+            if source is None:
+                data[name] = convert(row, request)
+                continue
+            value = get(source)
+            data[name] = None if value is None else convert(value)
+        return data
+
+
+class FastURLShortenResponseSerializer(ValuesSerializer):
+    serializer_class = URLShortenResponseSerializer
+
+    def __init__(self):
+        super().__init__()
+        if 'short_code' not in self.source_fields:
+            self.source_fields.append('short_code')
+
+    def get_short_url(self, row, request):
+        short_code = row['short_code'] if isinstance(row, dict) else row.short_code
+        if request:
+            return f'{get_base_url(request)}/short/{short_code}/'
+        return f'/short/{short_code}/'
+
+
+class FastURLStatsSerializer(ValuesSerializer):
+    serializer_class = URLStatsSerializer
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import URLMapping
+
+
+# Unlike save()/delete() overrides these also fire for QuerySet.delete(),
+# which the admin's delete actions use. QuerySet.update() sends no signal
+# and has to invalidate explicitly (see increment_access_count).
+@receiver(post_save, sender=URLMapping)
+@receiver(post_delete, sender=URLMapping)
+def invalidate_url_stats(sender, instance, **kwargs):
+    URLMapping.invalidate_stats_cache(instance.short_code)
@@ -1,10 +1,43 @@
 from django.test import TestCase, Client
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import URLMapping
-from .serializers import URLShortenSerializer
+from .models import STATS_CACHE_TIMEOUT, CreatorQuota, URLMapping
+from .utils import get_client_ip, normalize_ip
+from .views import URLShortenerRateThrottle
+from .serializers import (
+    FastURLShortenResponseSerializer,
+    FastURLStatsSerializer,
+    URLShortenResponseSerializer,
+    URLShortenSerializer,
+    URLStatsSerializer
+)
+from .renderers import FastJSONRenderer
+from .trending import SpaceSaving, TrendingTracker, get_tracker
+from collections import Counter
+from rest_framework.renderers import JSONRenderer
+from .log import (
+    AggregatingQueueListener,
+    DeferredQueueHandler,
+    JSONFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+    install_queue_logging
+)
 import json
+import logging
+import os
+import tempfile
+import unittest
+import queue
+import random
+import time
+from unittest import mock
 
 
 class URLMappingModelTests(TestCase):
@@ -179,4 +212,642 @@ class URLShortenerAPITests(APITestCase):
         self.assertEqual(response_data['status'], 'healthy')
         self.assertIn('timestamp', response_data)
         self.assertIn('version', response_data)
-    
\ No newline at end of file
+
+
+class LoggingTests(TestCase):
+    def make_record(self, msg="Short code not found: %s", args=('abc',),
+                    level=logging.WARNING, **extra):
+        record = logging.LogRecord('url_shortener.views', level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_formatter_includes_extra_fields(self):
+        record = self.make_record(event='short_code_not_found', short_code='abc')
+        payload = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(payload['event'], 'short_code_not_found')
+        self.assertEqual(payload['short_code'], 'abc')
+        self.assertEqual(payload['message'], 'Short code not found: abc')
+        self.assertEqual(payload['level'], 'WARNING')
+
+    def test_sampling_filter_uses_event_rate(self):
+        sampler = SamplingFilter(rates={'redirect': 0})
+        record = self.make_record(level=logging.INFO, event='redirect')
+        other = self.make_record(level=logging.INFO, event='shorten_created')
+
+        self.assertFalse(sampler.filter(record))
+        self.assertTrue(sampler.filter(other))
+
+    def test_sampling_filter_keeps_unlisted_warnings(self):
+        sampler = SamplingFilter(default_rate=0)
+
+        self.assertTrue(sampler.filter(self.make_record(event='short_code_not_found')))
+        self.assertFalse(sampler.filter(self.make_record(level=logging.INFO, event='redirect')))
+
+    def test_rate_limit_filter_aggregates_per_key(self):
+        now = [0.0]
+        limiter = RateLimitFilter(window=10, burst=1, clock=lambda: now[0])
+
+        self.assertTrue(limiter.filter(self.make_record(event='not_found', short_code='a')))
+        for _ in range(4):
+            self.assertFalse(limiter.filter(self.make_record(event='not_found', short_code='a')))
+        self.assertTrue(limiter.filter(self.make_record(event='not_found', short_code='b')))
+
+        now[0] = 5.0
+        self.assertEqual(limiter.collect(), [])
+
+        # Reported when the window closes, without another record for 'a'
+        now[0] = 12.0
+        summaries = limiter.collect()
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0].short_code, 'a')
+        self.assertEqual(summaries[0].suppressed, 4)
+        self.assertEqual(summaries[0].suppressed_window, 10)
+        self.assertEqual(summaries[0].levelno, logging.WARNING)
+        self.assertTrue(limiter.filter(summaries[0]))
+        self.assertEqual(limiter.collect(), [])
+
+    def test_rate_limit_filter_keeps_counts_when_keys_overflow(self):
+        now = [0.0]
+        limiter = RateLimitFilter(window=10, max_keys=2, clock=lambda: now[0])
+        for code in ('a', 'a', 'a', 'b'):
+            limiter.filter(self.make_record(event='not_found', short_code=code))
+
+        now[0] = 3.0
+        limiter.filter(self.make_record(event='not_found', short_code='c'))
+
+        summaries = limiter.collect()
+        self.assertEqual([(r.short_code, r.suppressed, r.suppressed_window) for r in summaries], [('a', 2, 3.0)])
+
+    def test_listener_emits_aggregates_on_stop(self):
+        limiter = RateLimitFilter(window=60)
+        received = []
+        handler = logging.Handler()
+        handler.emit = received.append
+        listener = AggregatingQueueListener(queue.SimpleQueue(), handler, aggregators=[limiter])
+        listener.start()
+        for _ in range(3):
+            limiter.filter(self.make_record(event='not_found', short_code='a'))
+
+        listener.stop()
+
+        self.assertEqual([r.suppressed for r in received], [2])
+
+    def test_full_queue_drops_and_reports(self):
+        handler = DeferredQueueHandler(queue.Queue(maxsize=2))
+        for _ in range(5):
+            handler.handle(self.make_record())
+
+        self.assertEqual(handler.queue.qsize(), 2)
+        summaries = handler.collect()
+        self.assertEqual([r.dropped for r in summaries], [3])
+        self.assertEqual(handler.collect(), [])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+    def test_forked_child_restarts_listener(self):
+        logger_name = 'url_shortener.tests.fork'
+        with tempfile.NamedTemporaryFile('r', suffix='.log') as log_file:
+            file_handler = logging.FileHandler(log_file.name)
+            file_handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger(logger_name)
+            logger.addHandler(file_handler)
+            logger.propagate = False
+            listener = install_queue_logging(logger_name)
+            try:
+                pid = os.fork()
+                if pid == 0:
+                    try:
+                        logger.warning("from child")
+                        listener.stop()
+                    finally:
+                        os._exit(0)
+                os.waitpid(pid, 0)
+            finally:
+                listener.stop()
+                for handler in list(logger.handlers):
+                    logger.removeHandler(handler)
+                file_handler.close()
+
+            self.assertIn("from child", log_file.read())
+
+    def test_listener_emits_aggregates_while_idle(self):
+        now = [0.0]
+        limiter = RateLimitFilter(window=10, clock=lambda: now[0])
+        received = []
+        handler = logging.Handler()
+        handler.emit = received.append
+        log_queue = queue.SimpleQueue()
+        listener = AggregatingQueueListener(log_queue, handler, aggregators=[limiter], interval=0.01)
+        for _ in range(3):
+            limiter.filter(self.make_record(event='not_found', short_code='a'))
+        now[0] = 10.0
+
+        listener.start()
+        try:
+            deadline = time.monotonic() + 2
+            while not received and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            listener.stop()
+
+        self.assertEqual([r.suppressed for r in received], [2])
+
+    def test_deferred_queue_handler_does_not_format(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        record = self.make_record()
+
+        handler.handle(record)
+
+        queued = log_queue.get_nowait()
+        self.assertIs(queued, record)
+        self.assertEqual(queued.msg, "Short code not found: %s")
+        self.assertEqual(queued.args, ('abc',))
+
+
+class CreatorQuotaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.shorten_url = reverse('shorten_url')
+
+    def post_url(self, url, ip='203.0.113.7'):
+        return self.client.post(
+            self.shorten_url,
+            data=json.dumps({"url": url}),
+            content_type='application/json',
+            REMOTE_ADDR=ip
+        )
+
+    def test_normalize_ip(self):
+        self.assertEqual(normalize_ip('203.0.113.7', ipv4_prefix=24), '203.0.113.0')
+        self.assertEqual(normalize_ip('2001:db8:1:2:3:4:5:6', ipv6_prefix=64), '2001:db8:1:2::')
+        self.assertEqual(normalize_ip('::ffff:203.0.113.7', ipv4_prefix=24), '203.0.113.0')
+        self.assertEqual(normalize_ip('203.0.113.7'), '203.0.113.7')
+        self.assertIsNone(normalize_ip('not-an-ip'))
+
+    @override_settings(URL_SHORTENER_CREATOR_IP_PREFIX={'ipv4': 24, 'ipv6': 64})
+    def test_creator_ip_recorded_normalized(self):
+        response = self.post_url("https://www.example.com/a")
+
+        mapping = URLMapping.objects.get(short_code=response.json()['short_code'])
+        self.assertEqual(mapping.creator_ip, '203.0.113.0')
+
+    @override_settings(
+        URL_SHORTENER_CREATOR_IP_PREFIX={'ipv4': 24, 'ipv6': 64},
+        URL_SHORTENER_DAILY_CREATOR_QUOTA=2
+    )
+    def test_daily_quota_enforced_per_network(self):
+        self.assertEqual(self.post_url("https://www.example.com/a", '203.0.113.7').status_code, 201)
+        self.assertEqual(self.post_url("https://www.example.com/b", '203.0.113.8').status_code, 201)
+
+        response = self.post_url("https://www.example.com/c", '203.0.113.9')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('error', response.json())
+
+        # Existing URLs are still returned and another network is unaffected
+        self.assertEqual(self.post_url("https://www.example.com/a", '203.0.113.7').status_code, 200)
+        self.assertEqual(self.post_url("https://www.example.com/c", '198.51.100.1').status_code, 201)
+        self.assertEqual(URLMapping.objects.filter(creator_ip='203.0.113.0').count(), 2)
+        self.assertEqual(CreatorQuota.objects.get(creator_ip='203.0.113.0').count, 2)
+
+    @override_settings(URL_SHORTENER_DAILY_CREATOR_QUOTA=2)
+    def test_spoofed_forwarded_for_does_not_reset_quota(self):
+        for i in range(2):
+            response = self.client.post(
+                self.shorten_url,
+                data=json.dumps({"url": f"https://www.example.com/{i}"}),
+                content_type='application/json',
+                REMOTE_ADDR='203.0.113.7',
+                HTTP_X_FORWARDED_FOR=f'198.51.{i}.1'
+            )
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(
+            self.shorten_url,
+            data=json.dumps({"url": "https://www.example.com/spoofed"}),
+            content_type='application/json',
+            REMOTE_ADDR='203.0.113.7',
+            HTTP_X_FORWARDED_FOR='192.0.2.1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttle_ignores_spoofed_forwarded_for(self):
+        request = RequestFactory().post(
+            '/', REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR='192.0.2.1'
+        )
+
+        self.assertEqual(URLShortenerRateThrottle().get_ident(request), '203.0.113.7')
+
+    def test_client_ip_behind_trusted_proxy(self):
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='192.0.2.1, 203.0.113.7'
+        )
+        self.assertEqual(get_client_ip(request), '10.0.0.1')
+
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            # The client-supplied first entry is ignored
+            self.assertEqual(get_client_ip(request), '203.0.113.7')
+
+    @override_settings(URL_SHORTENER_CREATOR_IP_PREFIX={'ipv4': 24, 'ipv6': 64})
+    def test_admin_search_by_raw_ip_matches_network(self):
+        URLMapping.objects.create(
+            original_url="https://www.example.com/mine", short_code="mine12", creator_ip='203.0.113.0'
+        )
+        URLMapping.objects.create(
+            original_url="https://www.example.com/other", short_code="other1", creator_ip='198.51.100.0'
+        )
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+        response = self.client.get(
+            reverse('admin:url_shortener_urlmapping_changelist'), {'q': '203.0.113.99'}
+        )
+
+        self.assertEqual(
+            [m.short_code for m in response.context['cl'].result_list], ['mine12']
+        )
+
+    def test_consume_purges_old_counters(self):
+        yesterday = timezone.now().date() - timezone.timedelta(days=1)
+        CreatorQuota.objects.create(creator_ip='203.0.113.0', day=yesterday, count=5)
+        CreatorQuota._purged_through = None
+
+        CreatorQuota.consume('198.51.100.0', 1)
+
+        self.assertFalse(CreatorQuota.objects.filter(day=yesterday).exists())
+
+    def test_consume_respects_limit(self):
+        self.assertTrue(CreatorQuota.consume('203.0.113.0', 1))
+        self.assertFalse(CreatorQuota.consume('203.0.113.0', 1))
+        self.assertTrue(CreatorQuota.consume('198.51.100.0', 1))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver', 'sho.rt', 'other.example'])
+class FastSerializationTests(TestCase):
+    def setUp(self):
+        self.mapping = URLMapping.objects.create(
+            original_url="https://www.example.com/caf\u00e9?q=\u2028",
+            short_code="fast12",
+            access_count=3
+        )
+        self.request = RequestFactory().get('/', HTTP_HOST='sho.rt')
+
+    def render(self, renderer, data):
+        return renderer.render(data, 'application/json')
+
+    def assert_same_output(self, fast_data, drf_data):
+        self.assertEqual(
+            self.render(FastJSONRenderer(), fast_data),
+            self.render(JSONRenderer(), drf_data)
+        )
+
+    def test_shorten_response_matches_model_serializer(self):
+        fast = FastURLShortenResponseSerializer()
+        row = URLMapping.objects.values(*fast.source_fields).get(pk=self.mapping.pk)
+        drf_data = URLShortenResponseSerializer(
+            self.mapping, context={'request': self.request}
+        ).data
+
+        self.assert_same_output(fast.serialize(row, self.request), drf_data)
+        self.assert_same_output(fast.serialize(self.mapping, self.request), drf_data)
+        self.assertEqual(
+            fast.serialize(row)['short_url'],
+            URLShortenResponseSerializer(self.mapping).data['short_url']
+        )
+
+    def test_stats_response_matches_model_serializer(self):
+        URLMapping.objects.filter(pk=self.mapping.pk).update(last_accessed=timezone.now())
+        self.mapping.refresh_from_db()
+        fast = FastURLStatsSerializer()
+
+        for mapping in (self.mapping, URLMapping.objects.create(original_url="https://a.example", short_code="none12")):
+            row = URLMapping.objects.values(*fast.source_fields).get(pk=mapping.pk)
+            self.assert_same_output(fast.serialize(row), URLStatsSerializer(mapping).data)
+
+    def test_base_url_is_per_host(self):
+        fast = FastURLShortenResponseSerializer()
+        other = RequestFactory().get('/', HTTP_HOST='other.example', secure=True)
+
+        self.assertEqual(fast.serialize(self.mapping, self.request)['short_url'], 'http://sho.rt/short/fast12/')
+        self.assertEqual(fast.serialize(self.mapping, other)['short_url'], 'https://other.example/short/fast12/')
+
+    @override_settings(USE_X_FORWARDED_PORT=True)
+    def test_base_url_is_per_forwarded_port(self):
+        fast = FastURLShortenResponseSerializer()
+        for port in ('8443', '9000'):
+            request = RequestFactory().get('/', HTTP_X_FORWARDED_PORT=port)
+            self.assertEqual(
+                fast.serialize(self.mapping, request)['short_url'],
+                request.build_absolute_uri('/short/fast12/')
+            )
+            self.assertIn(f':{port}/', fast.serialize(self.mapping, request)['short_url'])
+
+    def test_fast_renderer_matches_json_renderer(self):
+        payloads = [
+            {'error': 'Validation failed', 'details': {'url': ['bad \u2029 value']}},
+            {'ratio': 1e16, 'small': 1e-7},
+            {1: 'non-string key'},
+            [timezone.now(), 2 ** 70],
+        ]
+        for payload in payloads:
+            self.assertEqual(
+                self.render(FastJSONRenderer(), payload),
+                self.render(JSONRenderer(), payload)
+            )
+
+    def test_api_output_identical_in_both_modes(self):
+        cache.clear()
+        stats_url = reverse('url_stats', kwargs={'short_code': 'fast12'})
+        bodies = []
+        for fast in (True, False):
+            with override_settings(URL_SHORTENER_FAST_SERIALIZATION=fast):
+                cache.clear()
+                shorten = self.client.post(
+                    reverse('shorten_url'),
+                    data=json.dumps({'url': self.mapping.original_url}),
+                    content_type='application/json'
+                )
+                bodies.append((shorten.content, self.client.get(stats_url).content))
+
+        self.assertEqual(bodies[0], bodies[1])
+
+
+class TrendingTests(TestCase):
+    capacity = 100
+
+    def setUp(self):
+        cache.clear()
+
+    def zipf_stream(self, hits=50000, keys=2000, exponent=1.1, seed=7):
+        rng = random.Random(seed)
+        population = [f'code{i}' for i in range(keys)]
+        weights = [1 / (rank + 1) ** exponent for rank in range(keys)]
+        return rng.choices(population, weights=weights, k=hits)
+
+    def assert_within_bound(self, sketch, stream):
+        exact = Counter(stream)
+        bound = len(stream) / self.capacity
+
+        self.assertLessEqual(len(sketch), self.capacity)
+        for key, (count, error) in sketch.counts.items():
+            self.assertGreaterEqual(count, exact[key])
+            self.assertLessEqual(count - exact[key], error)
+            self.assertLessEqual(error, bound)
+
+        top = [key for key, _ in sketch.top(10)]
+        self.assertEqual(set(top), {key for key, _ in exact.most_common(10)})
+
+    def test_space_saving_matches_exact_counts_on_zipf_traffic(self):
+        stream = self.zipf_stream()
+        sketch = SpaceSaving(self.capacity)
+        for key in stream:
+            sketch.offer(key)
+
+        self.assert_within_bound(sketch, stream)
+
+    def test_merged_sketches_keep_error_bound(self):
+        stream = self.zipf_stream()
+        workers = [SpaceSaving(self.capacity) for _ in range(4)]
+        for i, key in enumerate(stream):
+            workers[i % len(workers)].offer(key)
+
+        merged = SpaceSaving.merge(self.capacity, workers)
+        self.assert_within_bound(merged, stream)
+
+    def test_tracker_window_drops_expired_buckets(self):
+        now = [0.0]
+        tracker = TrendingTracker(
+            capacity=self.capacity, window=60, buckets=6,
+            flush_interval=None, clock=lambda: now[0]
+        )
+        for _ in range(3):
+            tracker.record_hit('old')
+        tracker.flush()
+
+        now[0] = 30.0
+        tracker.record_hit('new')
+        tracker.flush()
+        counts = tracker.window_sketch().counts
+        self.assertEqual(counts['old'][0], 3)
+        self.assertEqual(counts['new'][0], 1)
+
+        now[0] = 65.0
+        self.assertNotIn('old', tracker.window_sketch().counts)
+        self.assertIn('new', tracker.window_sketch().counts)
+
+    def test_late_flush_counts_hits_in_their_own_bucket(self):
+        now = [0.0]
+        tracker = TrendingTracker(window=60, buckets=6, flush_interval=None, clock=lambda: now[0])
+
+        tracker.record_hit('early')
+        now[0] = 45.0
+        tracker.record_hit('late')
+        tracker.flush(store_top=False)
+        self.assertEqual(set(tracker.window_sketch().counts), {'early', 'late'})
+
+        # 'early' expires with its own bucket, not one window after the flush
+        now[0] = 65.0
+        self.assertEqual(set(tracker.window_sketch().counts), {'late'})
+
+    def test_hits_older_than_window_are_dropped_on_flush(self):
+        now = [0.0]
+        tracker = TrendingTracker(window=60, buckets=6, flush_interval=None, clock=lambda: now[0])
+
+        tracker.record_hit('stale')
+        now[0] = 120.0
+        tracker.flush(store_top=False)
+
+        self.assertEqual(tracker.window_sketch().counts, {})
+
+    def test_background_thread_flushes_idle_worker(self):
+        tracker = TrendingTracker(flush_interval=0.01, cache_prefix='trending-idle')
+
+        tracker.record_hit('abc')
+        deadline = time.monotonic() + 2
+        while 'abc' not in tracker.window_sketch().counts and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(tracker.window_sketch().counts['abc'][0], 1)
+        self.assertEqual(tracker.local, {})
+
+    def test_trending_endpoint(self):
+        URLMapping.objects.create(original_url="https://www.example.com/a", short_code="hot123")
+        URLMapping.objects.create(original_url="https://www.example.com/b", short_code="cold12")
+        for _ in range(3):
+            self.client.get(reverse('redirect_url', kwargs={'short_code': 'hot123'}))
+        self.client.get(reverse('redirect_url', kwargs={'short_code': 'cold12'}))
+        get_tracker().flush()
+
+        response = self.client.get(reverse('trending_urls'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([r['short_code'] for r in results], ['hot123', 'cold12'])
+        self.assertEqual(results[0]['clicks'], 3)
+        self.assertEqual(results[0]['original_url'], "https://www.example.com/a")
+
+
+class URLStatsCachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mapping = URLMapping.objects.create(
+            original_url="https://www.example.com/stats",
+            short_code="etag12",
+            access_count=2
+        )
+        self.stats_url = reverse('url_stats', kwargs={'short_code': 'etag12'})
+        self.redirect_url = reverse('redirect_url', kwargs={'short_code': 'etag12'})
+
+    def test_stats_response_has_validators(self):
+        response = self.client.get(self.stats_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(self.stats_url)['ETag']
+
+        response = self.client.get(self.stats_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_does_not_hide_same_second_clicks(self):
+        last_modified = self.client.get(self.stats_url)['Last-Modified']
+
+        self.mapping.increment_access_count()
+
+        response = self.client.get(self.stats_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['access_count'], 3)
+
+    def test_304_served_from_cache(self):
+        etag = self.client.get(self.stats_url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.stats_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_access_invalidates_cached_stats(self):
+        first = self.client.get(self.stats_url)
+        self.assertEqual(first.json()['access_count'], 2)
+
+        self.client.get(self.redirect_url)
+
+        response = self.client.get(self.stats_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['access_count'], 3)
+        self.assertIsNotNone(response.json()['last_accessed'])
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_stale_fill_after_invalidation_is_not_served(self):
+        self.client.get(self.stats_url)
+        stale_key = URLMapping.stats_cache_key('etag12')
+        stale_entry = cache.get(stale_key)
+
+        self.mapping.increment_access_count()
+        # A reader that loaded the old row before the update stores it late
+        cache.set(stale_key, stale_entry)
+
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.json()['access_count'], 3)
+
+    def test_admin_edit_invalidates_cached_stats(self):
+        self.client.get(self.stats_url)
+
+        self.mapping.original_url = "https://www.example.com/edited"
+        self.mapping.save()
+
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.json()['original_url'], "https://www.example.com/edited")
+
+    def test_queryset_delete_invalidates_cached_stats(self):
+        self.assertEqual(self.client.get(self.stats_url).status_code, status.HTTP_200_OK)
+
+        URLMapping.objects.filter(pk=self.mapping.pk).delete()
+
+        self.assertEqual(self.client.get(self.stats_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_admin_delete_creator_urls_invalidates_cached_stats(self):
+        URLMapping.objects.filter(pk=self.mapping.pk).update(creator_ip='203.0.113.0')
+        self.client.get(self.stats_url)
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+        changelist_url = reverse('admin:url_shortener_urlmapping_changelist')
+        response = self.client.post(changelist_url, {
+            'action': 'delete_creator_urls',
+            '_selected_action': [self.mapping.pk],
+        })
+        # The action only asks for confirmation
+        self.assertTemplateUsed(response, 'admin/delete_selected_confirmation.html')
+        self.assertTrue(URLMapping.objects.exists())
+
+        self.client.post(changelist_url, {
+            'action': 'delete_selected',
+            '_selected_action': [self.mapping.pk],
+            'post': 'yes',
+        })
+
+        self.assertFalse(URLMapping.objects.exists())
+        self.assertEqual(self.client.get(self.stats_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_admin_delete_creator_urls_requires_delete_permission(self):
+        URLMapping.objects.filter(pk=self.mapping.pk).update(creator_ip='203.0.113.0')
+        staff = User.objects.create_user('staff', password='password', is_staff=True)
+        staff.user_permissions.add(Permission.objects.get(codename='view_urlmapping'))
+        self.client.login(username='staff', password='password')
+
+        changelist_url = reverse('admin:url_shortener_urlmapping_changelist')
+        response = self.client.get(changelist_url)
+        self.assertNotContains(response, 'delete_creator_urls')
+        self.client.post(changelist_url, {
+            'action': 'delete_creator_urls',
+            '_selected_action': [self.mapping.pk],
+            'post': 'yes',
+        })
+
+        self.assertTrue(URLMapping.objects.filter(pk=self.mapping.pk).exists())
+
+    def test_unknown_codes_leave_no_cache_keys(self):
+        for i in range(5):
+            response = self.client.get(reverse('url_stats', kwargs={'short_code': f'nope{i}'}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(
+            cache.get_many([f'stats-version:nope{i}' for i in range(5)]), {}
+        )
+
+    def test_invalidating_uncached_code_stores_nothing(self):
+        for i in range(5):
+            URLMapping.invalidate_stats_cache(f'nope{i}')
+
+        self.assertEqual(
+            cache.get_many([f'stats-version:nope{i}' for i in range(5)]), {}
+        )
+
+    def test_unsignalled_change_is_served_once_entry_expires(self):
+        self.client.get(self.stats_url)
+        # Bulk updates skip the signals, like a write on another worker's cache
+        URLMapping.objects.filter(pk=self.mapping.pk).update(access_count=10)
+        self.assertEqual(self.client.get(self.stats_url).json()['access_count'], 2)
+
+        expired = time.time() + STATS_CACHE_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            response = self.client.get(self.stats_url)
+
+        self.assertLessEqual(STATS_CACHE_TIMEOUT, 300)
+        self.assertEqual(response.json()['access_count'], 10)
+
+    def test_evicted_version_does_not_revive_old_entry(self):
+        self.client.get(self.stats_url)
+        cache.delete('stats-version:etag12')
+
+        URLMapping.objects.filter(pk=self.mapping.pk).update(access_count=10)
+
+        self.assertEqual(self.client.get(self.stats_url).json()['access_count'], 10)
@@ -0,0 +1,289 @@
+import atexit
+import heapq
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS = {
+    # Counters kept per sketch; estimates are at most N / CAPACITY too high
+    'CAPACITY': 200,
+    # Length of the sliding window and the number of buckets it is split into
+    'WINDOW': 60 * 60,
+    'BUCKETS': 12,
+    # Seconds between a worker's background pushes of its local counts
+    'FLUSH_INTERVAL': 10,
+    # Number of entries served by /api/trending/
+    'TOP': 20,
+    'CACHE_PREFIX': 'trending',
+}
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally et al.).
+
+    Tracks at most ``capacity`` keys. Each estimate overshoots the true
+    count by at most its recorded error, which is itself bounded by
+    N / capacity for a stream of N hits.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}  # key -> [count, error]
+        self._heap = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def offer(self, key, count=1):
+        entry = self.counts.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.counts) < self.capacity:
+            entry = self.counts[key] = [count, 0]
+        else:
+            min_count, min_key = self._pop_min()
+            del self.counts[min_key]
+            entry = self.counts[key] = [min_count + count, min_count]
+        self._push(entry[0], key)
+
+    def min_count(self):
+        if len(self.counts) < self.capacity:
+            return 0
+        min_count, min_key = self._pop_min()
+        self._push(min_count, min_key)
+        return min_count
+
+    def top(self, n):
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1][0])
+
+    def to_dict(self):
+        return {key: list(entry) for key, entry in self.counts.items()}
+
+    @classmethod
+    def from_dict(cls, capacity, counts):
+        sketch = cls(capacity)
+        for key, (count, error) in heapq.nlargest(
+            capacity, (counts or {}).items(), key=lambda item: item[1][0]
+        ):
+            sketch.counts[key] = [count, error]
+        sketch._rebuild_heap()
+        return sketch
+
+    @classmethod
+    def merge(cls, capacity, sketches):
+        """
+        Combine sketches into one of ``capacity`` counters.
+
+        A key missing from a full sketch may still have had up to that
+        sketch's minimum count, so the minimum is added to both its count
+        and error, which keeps the error bound additive across sketches.
+        """
+        sketches = [s for s in sketches if s.counts]
+        floors = [s.min_count() for s in sketches]
+        base = sum(floors)
+        combined = {}
+        for sketch, floor in zip(sketches, floors):
+            for key, (count, error) in sketch.counts.items():
+                entry = combined.setdefault(key, [base, base])
+                entry[0] += count - floor
+                entry[1] += error - floor
+        return cls.from_dict(capacity, combined)
+
+    def _push(self, count, key):
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 2 * self.capacity + 16:
+            self._rebuild_heap()
+
+    def _pop_min(self):
+        # Entries are pushed on every increment; skip the outdated ones
+        while True:
+            count, key = heapq.heappop(self._heap)
+            entry = self.counts.get(key)
+            if entry is not None and entry[0] == count:
+                return count, key
+
+    def _rebuild_heap(self):
+        self._heap = [(entry[0], key) for key, entry in self.counts.items()]
+        heapq.heapify(self._heap)
+
+
+class TrendingTracker:
+    """
+    Per-process sketch of redirect hits, merged into time buckets in the cache.
+
+    Each worker counts hits locally, in one sketch per time slot, and a
+    background thread merges them into the matching cache buckets every
+    ``flush_interval`` seconds, so hits land in the slot they happened in
+    however late they are flushed. Buckets expire once they fall out of
+    the window, and every flush stores the top entries across the live
+    buckets so serving them is a single cache read. The cache must be
+    shared between workers (e.g. Redis or Memcached) for the result to
+    cover all of them. ``flush_interval=None`` disables the thread.
+    """
+
+    def __init__(self, capacity=DEFAULTS['CAPACITY'], window=DEFAULTS['WINDOW'],
+                 buckets=DEFAULTS['BUCKETS'], flush_interval=DEFAULTS['FLUSH_INTERVAL'],
+                 top=DEFAULTS['TOP'], cache_prefix=DEFAULTS['CACHE_PREFIX'],
+                 clock=time.time):
+        self.capacity = capacity
+        self.window = window
+        self.buckets = buckets
+        self.bucket_width = window / buckets
+        self.flush_interval = flush_interval
+        self.top = top
+        self.cache_prefix = cache_prefix
+        self.clock = clock
+        self.local = {}  # bucket index -> SpaceSaving
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULTS, **getattr(settings, 'URL_SHORTENER_TRENDING', {})}
+        return cls(
+            capacity=config['CAPACITY'],
+            window=config['WINDOW'],
+            buckets=config['BUCKETS'],
+            flush_interval=config['FLUSH_INTERVAL'],
+            top=config['TOP'],
+            cache_prefix=config['CACHE_PREFIX'],
+        )
+
+    @property
+    def top_key(self):
+        return f'{self.cache_prefix}:top'
+
+    def bucket_key(self, index):
+        return f'{self.cache_prefix}:bucket:{index}'
+
+    def record_hit(self, short_code):
+        index = self._bucket_index()
+        with self._lock:
+            sketch = self.local.get(index)
+            if sketch is None:
+                sketch = self.local[index] = SpaceSaving(self.capacity)
+            sketch.offer(short_code)
+        if self.flush_interval and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def flush(self, store_top=True):
+        with self._lock:
+            local, self.local = self.local, {}
+        if not local:
+            return True
+
+        lock_key = f'{self.cache_prefix}:lock'
+        if not cache.add(lock_key, 1, timeout=5):
+            # Another worker is flushing; keep the hits for the next round
+            with self._lock:
+                for index, sketch in local.items():
+                    current = self.local.get(index)
+                    if current is not None:
+                        sketch = SpaceSaving.merge(self.capacity, [current, sketch])
+                    self.local[index] = sketch
+            return False
+
+        try:
+            oldest = self._bucket_index() - self.buckets + 1
+            for index, sketch in local.items():
+                if index < oldest:
+                    continue  # already out of the window
+                key = self.bucket_key(index)
+                stored = SpaceSaving.from_dict(self.capacity, cache.get(key))
+                merged = SpaceSaving.merge(self.capacity, [stored, sketch])
+                expires = (index + self.buckets) * self.bucket_width - self.clock()
+                cache.set(key, merged.to_dict(), timeout=max(expires, 1))
+            if store_top:
+                self._store_top()
+        finally:
+            cache.delete(lock_key)
+        return True
+
+    def _start_flusher(self):
+        with self._lock:
+            # Checked by pid so forked workers start their own thread
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(
+            target=self._run_flusher, name='trending-flusher', daemon=True
+        ).start()
+        # Push the last hits on shutdown; the top list is rebuilt on demand
+        atexit.register(self.flush, store_top=False)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(
+                    "Flushing trending counts failed: %s", e,
+                    extra={'event': 'trending_flush_error'}
+                )
+            finally:
+                close_old_connections()
+
+    def get_trending(self):
+        data = cache.get(self.top_key)
+        if data is None:
+            data = self._store_top()
+        return data
+
+    def window_sketch(self):
+        current = self._bucket_index()
+        keys = [self.bucket_key(i) for i in range(current - self.buckets + 1, current + 1)]
+        return SpaceSaving.merge(self.capacity, [
+            SpaceSaving.from_dict(self.capacity, counts)
+            for counts in cache.get_many(keys).values()
+        ])
+
+    def _bucket_index(self):
+        return int(self.clock() // self.bucket_width)
+
+    def _store_top(self):
+        from .models import URLMapping
+
+        top = self.window_sketch().top(self.top)
+        original_urls = dict(
+            URLMapping.objects.filter(
+                short_code__in=[key for key, _ in top]
+            ).values_list('short_code', 'original_url')
+        )
+        data = {
+            'window': self.window,
+            'generated_at': timezone.now().isoformat(),
+            'results': [
+                {
+                    'short_code': short_code,
+                    'original_url': original_urls.get(short_code),
+                    'clicks': count,
+                    'max_overcount': error,
+                }
+                for short_code, (count, error) in top
+                if short_code in original_urls
+            ],
+        }
+        cache.set(self.top_key, data, timeout=self.bucket_width)
+        return data
+
+
+_tracker = None
+
+
+def get_tracker():
+    global _tracker
+    if _tracker is None:
+        _tracker = TrendingTracker.from_settings()
+    return _tracker
@@ -5,5 +5,6 @@ urlpatterns = [
     path('shorten/', views.shorten_url, name='shorten_url'),
     path('short/<str:short_code>/', views.redirect_url, name='redirect_url'),
     path('stats/<str:short_code>/', views.url_stats, name='url_stats'),
+    path('trending/', views.trending_urls, name='trending_urls'),
     path('health/', views.health_check, name='health_check'),
 ]
\ No newline at end of file
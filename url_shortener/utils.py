@@ -0,0 +1,37 @@
+import ipaddress
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+
+
+def get_client_ip(request):
+    # Like DRF's throttles: with NUM_PROXIES set, take the address the
+    # outermost trusted proxy appended to X-Forwarded-For. Without it the
+    # header is client-controlled, so only REMOTE_ADDR is used.
+    remote_addr = request.META.get('REMOTE_ADDR')
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    num_proxies = api_settings.NUM_PROXIES
+    if not num_proxies or not x_forwarded_for:
+        return remote_addr
+    addrs = x_forwarded_for.split(',')
+    return addrs[-min(num_proxies, len(addrs))].strip()
+
+
+def normalize_ip(ip, ipv4_prefix=32, ipv6_prefix=128):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    prefix = ipv4_prefix if address.version == 4 else ipv6_prefix
+    return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False).network_address)
+
+
+def normalize_creator_ip(ip):
+    prefixes = getattr(settings, 'URL_SHORTENER_CREATOR_IP_PREFIX', {})
+    return normalize_ip(
+        ip,
+        ipv4_prefix=prefixes.get('ipv4', 32),
+        ipv6_prefix=prefixes.get('ipv6', 128)
+    )
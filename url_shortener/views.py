@@ -7,18 +7,47 @@ from django.http import Http404, HttpResponseNotFound, HttpResponseServerError
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
 from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.decorators import method_decorator
 from django.views.generic import View
 from django.db import transaction
+from django.conf import settings
+import hashlib
+import json
 import logging
 from django.utils import timezone
 
-from .models import URLMapping
-from .serializers import URLShortenSerializer, URLShortenResponseSerializer, URLStatsSerializer
+from .models import STATS_CACHE_TIMEOUT, CreatorQuota, URLMapping
+from .trending import get_tracker
+from .utils import get_client_ip, normalize_creator_ip
+from .serializers import (
+    FastURLShortenResponseSerializer,
+    FastURLStatsSerializer,
+    URLShortenResponseSerializer,
+    URLShortenSerializer,
+    URLStatsSerializer
+)
 
 
 logger = logging.getLogger(__name__)
 
+fast_shorten_response_serializer = FastURLShortenResponseSerializer()
+fast_stats_serializer = FastURLStatsSerializer()
+
+
+def fast_serialization_enabled():
+    return getattr(settings, 'URL_SHORTENER_FAST_SERIALIZATION', False)
+
+
+def shorten_response_data(url_mapping, request):
+    if fast_serialization_enabled():
+        return fast_shorten_response_serializer.serialize(url_mapping, request)
+    return URLShortenResponseSerializer(
+        url_mapping,
+        context={'request': request}
+    ).data
+
 
 class URLShortenerRateThrottle(AnonRateThrottle):
     scope = 'url_shortener'
@@ -34,7 +63,10 @@ def shorten_url(request):
     try:
         serializer = URLShortenSerializer(data=request.data)
         if not serializer.is_valid():
-            logger.warning(f"Invalid URL shortening request: {serializer.errors}")
+            logger.warning(
+                "Invalid URL shortening request: %s", serializer.errors,
+                extra={'event': 'shorten_invalid'}
+            )
             return Response(
                 {
                     'error': 'Validation failed',
@@ -47,41 +79,61 @@ def shorten_url(request):
         original_url = validated_data['url']
         
         # Check if URL already exists
-        existing_mapping = URLMapping.objects.filter(
-            original_url=original_url
-        ).first()
+        existing = URLMapping.objects.filter(original_url=original_url)
+        if fast_serialization_enabled():
+            existing = existing.values(*fast_shorten_response_serializer.source_fields)
+        existing_mapping = existing.first()
         
         if existing_mapping:
-            logger.info(f"Returning existing mapping for URL: {original_url}")
-            response_serializer = URLShortenResponseSerializer(
-                existing_mapping, 
-                context={'request': request}
+            data = shorten_response_data(existing_mapping, request)
+            logger.info(
+                "Returning existing mapping %s", data['short_code'],
+                extra={'event': 'shorten_existing', 'short_code': data['short_code']}
             )
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+            return Response(data, status=status.HTTP_200_OK)
+        
+        creator_ip = get_creator_ip(request)
+        daily_quota = getattr(settings, 'URL_SHORTENER_DAILY_CREATOR_QUOTA', None)
         
         # Create new URL mapping
         with transaction.atomic():
+            if creator_ip and daily_quota is not None:
+                if not CreatorQuota.consume(creator_ip, daily_quota):
+                    logger.warning(
+                        "Daily creation quota exceeded for %s", creator_ip,
+                        extra={'event': 'creator_quota_exceeded', 'creator_ip': creator_ip}
+                    )
+                    return Response(
+                        {
+                            'error': 'Quota exceeded',
+                            'details': {'message': f'Daily limit of {daily_quota} short URLs reached'}
+                        },
+                        status=status.HTTP_429_TOO_MANY_REQUESTS
+                    )
+            
             short_code = URLMapping.generate_short_code()
             
             url_mapping = URLMapping.objects.create(
                 original_url=original_url,
-                short_code=short_code
+                short_code=short_code,
+                creator_ip=creator_ip
             )
             
-            logger.info(f"Created new URL mapping: {short_code} -> {original_url}")
-            
-            response_serializer = URLShortenResponseSerializer(
-                url_mapping,
-                context={'request': request}
+            logger.info(
+                "Created new URL mapping %s", short_code,
+                extra={'event': 'shorten_created', 'short_code': short_code}
             )
             
             return Response(
-                response_serializer.data,
+                shorten_response_data(url_mapping, request),
                 status=status.HTTP_201_CREATED
             )
     
     except Exception as e:
-        logger.error(f"Unexpected error in shorten_url: {str(e)}")
+        logger.error(
+            "Unexpected error in shorten_url: %s", e,
+            extra={'event': 'shorten_error'}
+        )
         return Response(
             {
                 'error': 'Internal server error',
@@ -99,31 +151,89 @@ def redirect_url(request, short_code):
         
         # Increment access count
         url_mapping.increment_access_count()
+        get_tracker().record_hit(short_code)
         
-        logger.info(f"Redirecting {short_code} to {url_mapping.original_url}")
+        logger.info(
+            "Redirecting %s", short_code,
+            extra={'event': 'redirect', 'short_code': short_code}
+        )
         
         return redirect(url_mapping.original_url)
         
     except Http404:
-        logger.warning(f"Short code not found: {short_code}")
+        logger.warning(
+            "Short code not found: %s", short_code,
+            extra={'event': 'short_code_not_found', 'short_code': short_code}
+        )
         return HttpResponseNotFound(f"Short URL '{short_code}' not found")
     
     except Exception as e:
-        logger.error(f"Unexpected error in redirect_url: {str(e)}")
+        logger.error(
+            "Unexpected error in redirect_url: %s", e,
+            extra={'event': 'redirect_error', 'short_code': short_code}
+        )
         return HttpResponseServerError("An unexpected error occurred")
 
 
+def get_stats_entry(short_code):
+    # Cached until the mapping changes (see URLMapping.stats_cache_key); the
+    # timeout only bounds memory use.
+    cache_key = URLMapping.stats_cache_key(short_code)
+    entry = cache.get(cache_key)
+    if entry is not None:
+        return entry
+    
+    try:
+        if fast_serialization_enabled():
+            row = URLMapping.objects.filter(short_code=short_code).values(
+                *fast_stats_serializer.source_fields
+            ).first()
+            if row is None:
+                raise Http404
+            data = fast_stats_serializer.serialize(row)
+            modified = row['last_accessed'] or row['created_at']
+        else:
+            url_mapping = get_object_or_404(URLMapping, short_code=short_code)
+            data = dict(URLStatsSerializer(url_mapping).data)
+            modified = url_mapping.last_accessed or url_mapping.created_at
+    except Http404:
+        # Don't leave a version key behind for every unknown code
+        URLMapping.forget_stats_cache(short_code)
+        raise
+    
+    digest = hashlib.md5(
+        json.dumps(data, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+    entry = {
+        'data': data,
+        'etag': quote_etag(digest),
+        'last_modified': int(modified.timestamp()),
+    }
+    cache.set(cache_key, entry, timeout=STATS_CACHE_TIMEOUT)
+    return entry
+
+
 @api_view(['GET'])
-@cache_page(60 * 5)  # Cache stats for 5 minutes
 def url_stats(request, short_code):
     try:
-        url_mapping = get_object_or_404(URLMapping, short_code=short_code)
+        entry = get_stats_entry(short_code)
         
-        serializer = URLStatsSerializer(url_mapping)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # 304 only on a matching If-None-Match. If-Modified-Since is ignored:
+        # Last-Modified has one-second resolution and would hide clicks made
+        # within the same second.
+        response = get_conditional_response(request, etag=entry['etag'])
+        if response is None:
+            response = Response(entry['data'], status=status.HTTP_200_OK)
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        response['Cache-Control'] = 'no-cache'
+        return response
         
     except Http404:
-        logger.warning(f"Stats requested for non-existent short code: {short_code}")
+        logger.warning(
+            "Stats requested for non-existent short code: %s", short_code,
+            extra={'event': 'stats_not_found', 'short_code': short_code}
+        )
         return Response(
             {
                 'error': 'Short URL not found',
@@ -133,7 +243,29 @@ def url_stats(request, short_code):
         )
     
     except Exception as e:
-        logger.error(f"Unexpected error in url_stats: {str(e)}")
+        logger.error(
+            "Unexpected error in url_stats: %s", e,
+            extra={'event': 'stats_error', 'short_code': short_code}
+        )
+        return Response(
+            {
+                'error': 'Internal server error',
+                'details': {'message': 'An unexpected error occurred'}
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def trending_urls(request):
+    try:
+        return Response(get_tracker().get_trending(), status=status.HTTP_200_OK)
+    
+    except Exception as e:
+        logger.error(
+            "Unexpected error in trending_urls: %s", e,
+            extra={'event': 'trending_error'}
+        )
         return Response(
             {
                 'error': 'Internal server error',
@@ -152,10 +284,5 @@ def health_check(request):
     })
 
 
-def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+def get_creator_ip(request):
+    return normalize_creator_ip(get_client_ip(request))